@@ -0,0 +1,232 @@
+import asyncio
+import gzip
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, fall back to gzip only
+    brotli = None
+
+# Bodies smaller than this are sent as-is, compression isn't worth it
+MINIMUM_SIZE = 1024
+
+# Fast levels for on-the-fly compression, high levels for bodies compressed once at write time
+LIVE_LEVELS = {"br": 4, "gzip": 6}
+STORED_LEVELS = {"br": 9, "gzip": 9}
+
+# Max number of posts kept in the precompressed body cache
+POST_CACHE_SIZE = 256
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Encodings we can produce, in order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the best encoding from an Accept-Encoding header.
+    Returns None if the client doesn't accept any encoding we support.
+    """
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, *params = part.split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    """Compress body with the given encoding. CPU bound, run it in a threadpool."""
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def compress_all(body: bytes, levels: Dict[str, int]) -> Dict[str, bytes]:
+    """Compress body with every supported encoding at the given levels."""
+    return {
+        encoding: compress(body, encoding, levels[encoding])
+        for encoding in supported_encodings()
+    }
+
+
+class PostBodyCache:
+    """
+    In-process LRU of precompressed post bodies, one entry per post.
+    An entry is only served while the rendered body still matches it byte for byte,
+    so any change to the post (content, likes, owner info) is a new version.
+    """
+
+    def __init__(self, max_size: int = POST_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[bytes, Dict[str, bytes]]]" = OrderedDict()
+
+    def get(self, post_id: str, body: bytes) -> Optional[Dict[str, bytes]]:
+        entry = self._entries.get(post_id)
+        if entry is None or entry[0] != body:
+            return None
+        self._entries.move_to_end(post_id)
+        return entry[1]
+
+    def set(self, post_id: str, body: bytes, variants: Dict[str, bytes]):
+        self._entries[post_id] = (body, variants)
+        self._entries.move_to_end(post_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def evict(self, post_id: str):
+        self._entries.pop(post_id, None)
+
+
+post_body_cache = PostBodyCache()
+
+# Compressions currently running, per post, so concurrent misses share one job
+_in_flight: Dict[str, Tuple[bytes, "asyncio.Future[Dict[str, bytes]]"]] = {}
+
+
+def render_post_body(post) -> bytes:
+    """Serialize a post exactly the way FastAPI would for the response_model."""
+    return JSONResponse(content=jsonable_encoder(post)).body
+
+
+async def precompress_post(
+    post_id: str, post, levels: Dict[str, int] = LIVE_LEVELS
+) -> Tuple[bytes, Dict[str, bytes]]:
+    """
+    Render a post and make sure its compressed variants are cached.
+    Compression only happens when this version of the body isn't cached yet,
+    and concurrent callers for the same body wait on a single compression.
+    Writes pass STORED_LEVELS, reads that miss the cache use the cheaper LIVE_LEVELS.
+    """
+    body = render_post_body(post)
+    if len(body) < MINIMUM_SIZE:
+        post_body_cache.evict(post_id)
+        return body, {}
+
+    variants = post_body_cache.get(post_id, body)
+    if variants is not None:
+        return body, variants
+
+    pending = _in_flight.get(post_id)
+    if pending is None or pending[0] != body:
+        job = asyncio.ensure_future(run_in_threadpool(compress_all, body, levels))
+        pending = (body, job)
+        _in_flight[post_id] = pending
+
+        def finish(job, post_id=post_id, pending=pending):
+            # A newer version may have started meanwhile, only the latest one is cached
+            if _in_flight.get(post_id) is not pending:
+                return
+            del _in_flight[post_id]
+            if not job.cancelled() and job.exception() is None:
+                post_body_cache.set(post_id, pending[0], job.result())
+
+        job.add_done_callback(finish)
+
+    # Shield the shared job so one cancelled request doesn't cancel it for the others
+    return body, await asyncio.shield(pending[1])
+
+
+async def post_response(
+    request: Request, post_id: str, post, levels: Dict[str, int] = LIVE_LEVELS
+) -> Response:
+    """Build the response for a single post, served from the precompressed cache when possible."""
+    body, variants = await precompress_post(post_id, post, levels)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+
+    headers = {"Vary": "Accept-Encoding"} if variants else {}
+    if encoding in variants:
+        body = variants[encoding]
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/brotli compression for responses above MINIMUM_SIZE.
+    Responses that already carry a Content-Encoding (precompressed posts) and
+    streamed responses are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                passthrough = "content-encoding" in Headers(raw=message["headers"])
+                if passthrough:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            if message.get("more_body", False):
+                # Streaming response, don't buffer it
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if len(body) < self.minimum_size:
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = await run_in_threadpool(
+                compress, body, encoding, LIVE_LEVELS[encoding]
+            )
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -3,6 +3,7 @@ from .database import db
 from .routes import users, posts
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
+from .compression import CompressionMiddleware
 
 load_dotenv()  # loads the env file
 
@@ -19,6 +20,7 @@ api.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+api.add_middleware(CompressionMiddleware)
 api.include_router(users.router)
 api.include_router(posts.router)
 
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from app.database import db
 from app.schemas import PostCreate, PostOut, Post, PostWithUser
 from app.dependencies import get_current_user
@@ -6,6 +6,12 @@ from bson import ObjectId
 from typing import List, Dict, Any
 from datetime import datetime
 from app.utils import replace_nbsp_in_post
+from app.compression import (
+    STORED_LEVELS,
+    post_body_cache,
+    post_response,
+    precompress_post,
+)
 
 router = APIRouter(prefix="/posts", tags=["Posts"])
 
@@ -96,7 +102,9 @@ async def get_user_info(user_id: str) -> Dict[str, Any]:
 
 
 @router.post("/", response_model=PostWithUser)
-async def create_post(post: PostCreate, current_user: dict = Depends(get_current_user)):
+async def create_post(
+    request: Request, post: PostCreate, current_user: dict = Depends(get_current_user)
+):
     # Check if user's post count is less than 50
     if current_user.get("postCount", 0) >= 50:
         raise HTTPException(
@@ -135,7 +143,11 @@ async def create_post(post: PostCreate, current_user: dict = Depends(get_current
     created_post["id"] = str(created_post.pop("_id"))
     created_post["owner_name"] = user_info["name"]
     created_post["owner_photo"] = user_info["photo"]
-    return created_post
+
+    # Compress the new post once here so reads are served from the cache
+    return await post_response(
+        request, created_post["id"], PostWithUser(**created_post), STORED_LEVELS
+    )
 
 
 @router.get("/", response_model=List[PostWithUser])
@@ -208,7 +220,7 @@ async def get_my_posts(
 
 
 @router.get("/{post_id}", response_model=PostWithUser)
-async def get_one_posts(post_id: str):
+async def get_one_posts(request: Request, post_id: str):
     try:
         post = await db.posts.find_one({"_id": ObjectId(post_id)})
 
@@ -220,7 +232,7 @@ async def get_one_posts(post_id: str):
             del post["_id"]
             post["owner_name"] = user_info["name"]
             post["owner_photo"] = user_info["photo"]
-            return post
+            return await post_response(request, post["id"], PostWithUser(**post))
         else:
             raise HTTPException(status_code=404, detail="Post not found")
     except Exception as e:
@@ -248,12 +260,24 @@ async def update_post(
 
         update_data = replace_nbsp_in_post(updated_post.dict())
         await db.posts.update_one({"_id": ObjectId(post_id)}, {"$set": update_data})
-        return "updated"
     except Exception as e:
         if "invalid ObjectId" in str(e):
             raise HTTPException(status_code=400, detail="Invalid post ID format")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+    # Precompress the new version so the next read doesn't have to.
+    # The update is already saved, so a failure here must not fail the request.
+    try:
+        user_info = await get_user_info(post["owner_id"])
+        post.update(update_data)
+        post["id"] = str(post.pop("_id"))
+        post["owner_name"] = user_info["name"]
+        post["owner_photo"] = user_info["photo"]
+        await precompress_post(post["id"], PostWithUser(**post), STORED_LEVELS)
+    except Exception:
+        post_body_cache.evict(post_id)
+    return "updated"
+
 
 @router.delete("/{post_id}")
 async def delete_post(post_id: str, current_user: dict = Depends(get_current_user)):
@@ -266,6 +290,7 @@ async def delete_post(post_id: str, current_user: dict = Depends(get_current_use
             raise HTTPException(status_code=403, detail="You can't delete this post")
 
         await db.posts.delete_one({"_id": ObjectId(post_id)})
+        post_body_cache.evict(post_id)
 
         # Decrement user's post count after successful post deletion
         await db.users.update_one(
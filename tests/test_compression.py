@@ -0,0 +1,187 @@
+import asyncio
+import gzip
+
+import brotli
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app import compression
+from app.compression import (
+    LIVE_LEVELS,
+    STORED_LEVELS,
+    CompressionMiddleware,
+    PostBodyCache,
+    negotiate_encoding,
+    post_body_cache,
+    post_response,
+    precompress_post,
+)
+
+BIG_POST = {"id": "p1", "content": "<p>Hello world</p>" * 200}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    post_body_cache._entries.clear()
+    compression._in_flight.clear()
+    yield
+    post_body_cache._entries.clear()
+    compression._in_flight.clear()
+
+
+@pytest.fixture
+def client():
+    api = FastAPI()
+    api.add_middleware(CompressionMiddleware)
+
+    @api.get("/big")
+    async def big():
+        return {"content": "<p>Hello world</p>" * 200}
+
+    @api.get("/small")
+    async def small():
+        return {"content": "hi"}
+
+    @api.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(10):
+                yield b"x" * 500
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @api.get("/post")
+    async def post(request: Request):
+        return await post_response(request, "p1", BIG_POST)
+
+    return TestClient(api)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0, gzip", "gzip"),
+        ("br;q=0.5, gzip;q=0.8", "gzip"),
+        ("gzip;q=0.8;x=1", "gzip"),
+        ("gzip;level=1;q=0", None),
+        ("gzip; Q=0", None),
+        ("GZIP ; q = 0.5", "gzip"),
+        ("gzip;q=abc", None),
+        ("*", "br"),
+        ("*;q=0, gzip", "gzip"),
+        ("br;q=0, *", "gzip"),
+    ],
+)
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_cache_hit_miss_and_eviction():
+    cache = PostBodyCache(max_size=2)
+    cache.set("a", b"body-a", {"gzip": b"ga"})
+    cache.set("b", b"body-b", {"gzip": b"gb"})
+
+    assert cache.get("a", b"body-a") == {"gzip": b"ga"}
+    # A different body is a different version of the post
+    assert cache.get("a", b"body-a2") is None
+    assert cache.get("missing", b"body-a") is None
+
+    # "a" was used last, so "b" is the least recently used entry
+    cache.set("c", b"body-c", {"gzip": b"gc"})
+    assert cache.get("b", b"body-b") is None
+    assert cache.get("a", b"body-a") is not None
+    assert cache.get("c", b"body-c") is not None
+
+    cache.evict("a")
+    assert cache.get("a", b"body-a") is None
+
+
+def test_precompress_post_caches_once(monkeypatch):
+    calls = []
+    compress_all = compression.compress_all
+
+    def counting_compress_all(body, levels):
+        calls.append(levels)
+        return compress_all(body, levels)
+
+    monkeypatch.setattr(compression, "compress_all", counting_compress_all)
+
+    async def run():
+        results = await asyncio.gather(
+            *(precompress_post("p1", BIG_POST) for _ in range(5))
+        )
+        await precompress_post("p1", BIG_POST)
+        return results
+
+    results = asyncio.run(run())
+    assert calls == [LIVE_LEVELS]
+    body, variants = results[0]
+    assert gzip.decompress(variants["gzip"]) == body
+    assert brotli.decompress(variants["br"]) == body
+
+
+def test_precompress_post_skips_small_bodies():
+    post_body_cache.set("p1", b"old", {"gzip": b"old"})
+    body, variants = asyncio.run(precompress_post("p1", {"content": "hi"}))
+    assert variants == {}
+    assert "p1" not in post_body_cache._entries
+
+
+def test_precompress_post_uses_given_levels(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        compression, "compress_all", lambda body, levels: calls.append(levels) or {}
+    )
+    asyncio.run(precompress_post("p1", BIG_POST, STORED_LEVELS))
+    assert calls == [STORED_LEVELS]
+
+
+@pytest.mark.parametrize("encoding", ["br", "gzip"])
+def test_middleware_compresses_large_responses(client, encoding):
+    response = client.get("/big", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(BIG_POST["content"])
+    assert response.json()["content"] == BIG_POST["content"]
+
+
+def test_middleware_skips_without_accept_encoding(client):
+    response = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.json()["content"] == BIG_POST["content"]
+
+
+def test_middleware_skips_small_responses(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"content": "hi"}
+
+
+def test_middleware_passes_streaming_through(client):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == b"x" * 5000
+
+
+def test_middleware_leaves_precompressed_post_untouched(client, monkeypatch):
+    # Warm the cache, then make sure the middleware doesn't compress again
+    client.get("/post", headers={"Accept-Encoding": "br"})
+    monkeypatch.setattr(
+        compression, "compress", lambda *args: pytest.fail("compressed twice")
+    )
+
+    response = client.get("/post", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == BIG_POST
+
+    response = client.get("/post", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == BIG_POST